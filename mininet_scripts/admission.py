@@ -0,0 +1,94 @@
+import collections
+import time
+
+
+class DatapathAdmission(object):
+    """Rate-limited bring-up queue for newly connected datapaths.
+
+    When many switches connect together (controller start, network blip)
+    their features replies are queued here instead of being configured on
+    the spot. ``admit`` drains the queue with a token bucket, and a datapath
+    only counts as ready once the switch has acknowledged its initial
+    configuration with a barrier reply.
+    """
+
+    def __init__(self, configure, rate=50, burst=50):
+        self.configure = configure  # Callback installing the initial flows on a datapath
+        self.rate = rate  # Datapaths configured per second
+        self.burst = burst  # Max datapaths configured in a single tick
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.queue = collections.deque()  # Datapaths waiting to be configured
+        self.pending = {}  # dpid -> (datapath, barrier xid) waiting for the barrier reply
+
+    def enqueue(self, datapath):
+        self.queue.append(datapath)
+
+    def admit(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+        admitted = 0
+        while self.queue and self.tokens >= 1:
+            datapath = self.queue.popleft()
+            if not datapath.is_active:
+                continue
+            self.tokens -= 1
+            self.configure(datapath)
+            barrier = datapath.ofproto_parser.OFPBarrierRequest(datapath)
+            datapath.send_msg(barrier)
+            self.pending[datapath.id] = (datapath, barrier.xid)
+            admitted += 1
+        return admitted
+
+    def barrier_reply(self, datapath, xid):
+        """Return the datapath if this reply completes its configuration."""
+        entry = self.pending.get(datapath.id)
+        if entry is None or entry[1] != xid:
+            return None
+        del self.pending[datapath.id]
+        return entry[0]
+
+    def has_newer(self, datapath):
+        """Tell whether another connection of the same switch is being admitted."""
+        entry = self.pending.get(datapath.id)
+        if entry is not None and entry[0] is not datapath:
+            return True
+        return any(dp is not datapath and dp.id == datapath.id for dp in self.queue)
+
+    def forget(self, datapath):
+        """Drop the entries of a dead connection, leaving a reconnection alone."""
+        dpid = datapath.id
+        self.queue = collections.deque(dp for dp in self.queue if dp is not datapath)
+        entry = self.pending.get(dpid)
+        if entry is not None and entry[0] is datapath:
+            del self.pending[dpid]
+
+
+class FlowModCache(object):
+    """Serialize the initial FlowMods once and reuse the raw bytes.
+
+    Every switch gets the same table-miss entry, so there is no point in
+    rebuilding and re-serializing the message per datapath: the bytes are
+    produced for the first datapath of a given OpenFlow version and then
+    sent as they are to the others.
+    """
+
+    def __init__(self, build):
+        self.build = build  # Callback returning the list of messages for a datapath
+        self.cache = {}  # OpenFlow version -> list of serialized messages
+
+    def send(self, datapath):
+        version = datapath.ofproto.OFP_VERSION
+        bufs = self.cache.get(version)
+        if bufs is None:
+            bufs = []
+            for msg in self.build(datapath):
+                msg.set_xid(0)
+                msg.serialize()
+                bufs.append(bytes(msg.buf))
+            self.cache[version] = bufs
+        for buf in bufs:
+            datapath.send(buf)
+        return bufs
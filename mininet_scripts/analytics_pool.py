@@ -0,0 +1,190 @@
+import multiprocessing
+import os
+import queue
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from anomaly_detector import AnomalyDetector
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TOP_K = 5  # Busiest ports reported with every result
+
+# Layout of a batch segment: n rows of (port_no, rx_bytes, tx_bytes) as
+# uint64, followed by n rows of (rx_rate, tx_rate, anomalous, valid) as
+# float64 written back by the worker
+IN_COLUMNS = 3
+OUT_COLUMNS = 4
+
+
+def _views(shm, n):
+    counters = np.ndarray((n, IN_COLUMNS), dtype=np.uint64, buffer=shm.buf)
+    out = np.ndarray((n, OUT_COLUMNS), dtype=np.float64, buffer=shm.buf, offset=n * IN_COLUMNS * 8)
+    return counters, out
+
+
+def _analyse(detector, prev, dpid, counters, out, timestamp):
+    port_nos = counters[:, 0].astype(np.int64)
+    current = counters[:, 1:]
+
+    # Previous sample of each port, NaN time when the port is new
+    previous = [prev.get((dpid, int(port_no))) for port_no in port_nos]
+    valid = np.array([p is not None for p in previous], dtype=bool)
+    prev_counters = np.array([p[:2] if p is not None else (0, 0) for p in previous], dtype=np.uint64).reshape(-1, 2)
+    prev_time = np.array([p[2] if p is not None else np.nan for p in previous])
+
+    # uint64 subtraction wraps, reinterpreting it as int64 gives the signed delta
+    delta = (current - prev_counters).view(np.int64)
+    rates = delta / (timestamp - prev_time)[:, None]
+    rates[~valid] = 0
+
+    anomalous = np.zeros(len(port_nos), dtype=bool)
+    anomalous[valid] = detector.update(dpid, port_nos[valid].tolist(), rates[valid, 0], rates[valid, 1], now=timestamp)
+
+    out[:, :2] = rates
+    out[:, 2] = anomalous
+    out[:, 3] = valid
+
+    for port_no, rx_bytes, tx_bytes in counters.tolist():
+        prev[(dpid, port_no)] = (rx_bytes, tx_bytes, timestamp)
+
+    total = rates.sum(axis=1)
+    top = np.argsort(total)[::-1][:TOP_K]
+    return [(int(port_nos[i]), float(total[i])) for i in top if valid[i]]
+
+
+def _worker(tasks, results, detector_kwargs):
+    detector = AnomalyDetector(**detector_kwargs)
+    prev = {}  # (dpid, port_no) -> (rx_bytes, tx_bytes, time)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        kind = task[0]
+        if kind == 'batch':
+            _, dpid, name, n, timestamp = task
+            shm = shared_memory.SharedMemory(name=name)
+            counters, out = _views(shm, n)
+            top = _analyse(detector, prev, dpid, counters, out, timestamp)
+            del counters, out
+            shm.close()
+            results.put((dpid, name, n, timestamp, top))
+        elif kind == 'capacity':
+            _, dpid, port_no, capacity_mbps = task
+            detector.set_link_capacity(dpid, port_no, capacity_mbps)
+        elif kind == 'reset':
+            _, dpid, port_no = task
+            prev.pop((dpid, port_no), None)
+            detector.reset(dpid, port_no)
+        elif kind == 'forget':
+            _, dpid = task
+            for key in [key for key in prev if key[0] == dpid]:
+                del prev[key]
+            detector.forget(dpid)
+
+
+class AnalyticsResult(object):
+
+    def __init__(self, dpid, timestamp, port_nos, rx_rates, tx_rates, anomalous, top):
+        self.dpid = dpid
+        self.timestamp = timestamp
+        self.port_nos = port_nos
+        self.rx_rates = rx_rates
+        self.tx_rates = tx_rates
+        self.anomalous = anomalous
+        self.top = top  # [(port_no, Bytes/sec)] of the busiest ports
+
+
+class AnalyticsPool(object):
+    """Run throughput math and anomaly scoring in worker processes.
+
+    Counters of a stats reply are copied into a shared memory segment and
+    only its name travels through the task queue. Each datapath is pinned
+    to one worker, which owns the previous counters and the detector
+    baselines of its ports. ``poll`` never blocks, so it can be called from
+    a green thread of the controller to collect finished results.
+
+    Checked with eventlet.monkey_patch(thread=False), the patching done by
+    ryu-manager, in a standalone script. The pool has not been run under
+    ryu-manager itself.
+    """
+
+    def __init__(self, workers=2, **detector_kwargs):
+        # Forking the eventlet hub is unsafe, start clean interpreters instead
+        ctx = multiprocessing.get_context('spawn')
+        self.results = ctx.Queue()
+        self.tasks = [ctx.Queue() for _ in range(workers)]
+        self.processes = [ctx.Process(target=_worker, args=(tasks, self.results, detector_kwargs), daemon=True)
+                          for tasks in self.tasks]
+        # Spawned workers import this module by name with the parent's
+        # sys.path, which ryu-manager restores once the app is loaded
+        added = MODULE_DIR not in sys.path
+        if added:
+            sys.path.insert(0, MODULE_DIR)
+        try:
+            for process in self.processes:
+                process.start()
+        finally:
+            if added:
+                sys.path.remove(MODULE_DIR)
+        self.segments = {}  # Segment name -> SharedMemory waiting for its result
+
+    def _tasks(self, dpid):
+        return self.tasks[dpid % len(self.tasks)]
+
+    def submit(self, dpid, port_nos, rx_bytes, tx_bytes, timestamp):
+        n = len(port_nos)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n * (IN_COLUMNS + OUT_COLUMNS) * 8))
+        counters, _ = _views(shm, n)
+        counters[:, 0] = port_nos
+        counters[:, 1] = rx_bytes
+        counters[:, 2] = tx_bytes
+        del counters
+        self.segments[shm.name] = shm
+        self._tasks(dpid).put(('batch', dpid, shm.name, n, timestamp))
+
+    def set_link_capacity(self, dpid, port_no, capacity_mbps):
+        self._tasks(dpid).put(('capacity', dpid, port_no, capacity_mbps))
+
+    def reset(self, dpid, port_no):
+        self._tasks(dpid).put(('reset', dpid, port_no))
+
+    def forget(self, dpid):
+        self._tasks(dpid).put(('forget', dpid))
+
+    def alive(self):
+        return all(process.is_alive() for process in self.processes)
+
+    def poll(self):
+        """Return the results finished so far, without waiting."""
+        results = []
+        while True:
+            try:
+                dpid, name, n, timestamp, top = self.results.get_nowait()
+            except queue.Empty:
+                break
+            shm = self.segments.pop(name)
+            counters, out = _views(shm, n)
+            valid = out[:, 3] > 0
+            results.append(AnalyticsResult(dpid, timestamp,
+                                           counters[valid, 0].astype(np.int64).tolist(),
+                                           out[valid, 0].copy(), out[valid, 1].copy(),
+                                           out[valid, 2] > 0, top))
+            del counters, out
+            shm.close()
+            shm.unlink()
+        return results
+
+    def close(self):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for shm in self.segments.values():
+            shm.close()
+            shm.unlink()
+        self.segments = {}
@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+
+RX = 0
+TX = 1
+
+
+class AnomalyDetector(object):
+    """Per-port, per-direction throughput baselines with O(1) updates.
+
+    Every (dpid, port_no) owns a row in a set of numpy arrays holding an
+    EWMA mean and variance for RX and TX (optionally one pair per seasonal
+    bucket). All the ports of a stats reply are scored and updated in a
+    single vectorized pass, so the cost of a reply does not grow with the
+    Python-level work per port.
+    """
+
+    def __init__(self, alpha=0.3, k=3.0, warmup=3,
+                 capacity_ratio=0.8, min_utilisation=0.1,
+                 min_sigma_ratio=0.05, rebaseline_after=6,
+                 default_capacity_mbps=10, seasonal_buckets=1,
+                 season_period=86400, initial_size=64):
+        self.alpha = alpha  # EWMA smoothing factor
+        self.k = k  # Number of standard deviations above the mean
+        self.warmup = warmup  # Samples needed before the baseline is trusted
+        self.capacity_ratio = capacity_ratio  # Hard limit as a fraction of link capacity
+        self.min_utilisation = min_utilisation  # Ignore deviations below this fraction of capacity
+        self.min_sigma_ratio = min_sigma_ratio  # Floor of the standard deviation, as a fraction of capacity
+        self.rebaseline_after = rebaseline_after  # Consecutive anomalous samples before the baseline is reset
+        self.default_capacity = default_capacity_mbps * 1_000_000 / 8  # Bytes/sec
+        self.buckets = max(1, int(seasonal_buckets))
+        self.season_period = season_period
+
+        self.index = {}  # (dpid, port_no) -> row in the arrays below
+        self.size = 0
+        self.free = []  # Rows released by forget, reused before growing
+        self._allocate(initial_size)
+
+    def _allocate(self, rows):
+        self.mean = np.zeros((rows, self.buckets, 2))
+        self.var = np.zeros((rows, self.buckets, 2))
+        self.count = np.zeros((rows, self.buckets), dtype=np.int64)
+        self.streak = np.zeros((rows, self.buckets), dtype=np.int64)
+        self.capacity = np.full(rows, self.default_capacity)
+
+    def _grow(self):
+        rows = len(self.capacity) * 2
+        mean, var, count, streak, capacity = self.mean, self.var, self.count, self.streak, self.capacity
+        self._allocate(rows)
+        self.mean[:self.size] = mean[:self.size]
+        self.var[:self.size] = var[:self.size]
+        self.count[:self.size] = count[:self.size]
+        self.streak[:self.size] = streak[:self.size]
+        self.capacity[:self.size] = capacity[:self.size]
+
+    def _row(self, dpid, port_no):
+        row = self.index.get((dpid, port_no))
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                if self.size == len(self.capacity):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self.index[(dpid, port_no)] = row
+        return row
+
+    def _bucket(self, now):
+        if self.buckets == 1:
+            return 0
+        return int((now % self.season_period) / self.season_period * self.buckets)
+
+    def set_link_capacity(self, dpid, port_no, capacity_mbps):
+        self.capacity[self._row(dpid, port_no)] = capacity_mbps * 1_000_000 / 8
+
+    def capacity_of(self, dpid, port_no):
+        row = self.index.get((dpid, port_no))
+        return self.default_capacity if row is None else self.capacity[row]
+
+    def reset(self, dpid, port_no):
+        row = self.index.get((dpid, port_no))
+        if row is not None:
+            self.mean[row] = 0
+            self.var[row] = 0
+            self.count[row] = 0
+            self.streak[row] = 0
+
+    def forget(self, dpid):
+        """Release the rows of every port of a datapath."""
+        for key in [key for key in self.index if key[0] == dpid]:
+            row = self.index.pop(key)
+            self.mean[row] = 0
+            self.var[row] = 0
+            self.count[row] = 0
+            self.streak[row] = 0
+            self.capacity[row] = self.default_capacity
+            self.free.append(row)
+
+    def nbytes(self):
+        return (self.mean.nbytes + self.var.nbytes + self.count.nbytes
+                + self.streak.nbytes + self.capacity.nbytes)
+
+    def update(self, dpid, port_nos, rx_rates, tx_rates, now=None):
+        """Score and absorb one sample per port, all ports in one pass.
+
+        Rates are in Bytes/sec. Returns a boolean array (one entry per port,
+        same order as ``port_nos``) telling which ports are anomalous in at
+        least one direction.
+        """
+        if not len(port_nos):
+            return np.zeros(0, dtype=bool)
+        if now is None:
+            now = time.time()
+
+        rows = np.fromiter((self._row(dpid, p) for p in port_nos),
+                           dtype=np.intp, count=len(port_nos))
+        bucket = self._bucket(now)
+        rates = np.column_stack((rx_rates, tx_rates)).astype(float)
+
+        mean = self.mean[rows, bucket]
+        var = self.var[rows, bucket]
+        count = self.count[rows, bucket]
+        streak = self.streak[rows, bucket]
+        capacity = self.capacity[rows][:, None]
+
+        # Hard limit relative to the link, always active
+        over_capacity = rates > self.capacity_ratio * capacity
+
+        # Statistical deviation, only once the baseline has warmed up and
+        # only when the port is carrying a meaningful share of its capacity.
+        # Sigma has a floor so that a flat baseline (idle or steady port)
+        # does not flag every small increase
+        sigma = np.maximum(np.sqrt(var), self.min_sigma_ratio * capacity)
+        deviation = ((count >= self.warmup)[:, None]
+                     & (rates > mean + self.k * sigma)
+                     & (rates > self.min_utilisation * capacity))
+
+        anomalous = (over_capacity | deviation).any(axis=1)
+
+        # Anomalous samples are kept out of the baseline so an attack does
+        # not become the new normal, unless the port stays anomalous long
+        # enough that the new level is taken as its baseline
+        streak = np.where(anomalous, streak + 1, 0)
+        rebaseline = anomalous & (streak >= self.rebaseline_after)
+        streak[rebaseline] = 0
+        self.streak[rows, bucket] = streak
+
+        learn = ~anomalous | rebaseline
+        rows, rates, mean, var = rows[learn], rates[learn], mean[learn], var[learn]
+        first = ((count[learn] == 0) | rebaseline[learn])[:, None]
+        diff = rates - mean
+        incr = self.alpha * diff
+        self.mean[rows, bucket] = np.where(first, rates, mean + incr)
+        self.var[rows, bucket] = np.where(first, 0.0, (1 - self.alpha) * (var + diff * incr))
+        self.count[rows, bucket] += 1
+
+        return anomalous
@@ -0,0 +1,101 @@
+"""PacketIn latency while large port stats replies are analysed.
+
+Simulates the controller hub: PacketIns arrive at a fixed pace and a stats
+reply for a switch with many ports is queued every so often. The reply is
+either analysed inline (as the controller does with ANALYTICS_WORKERS=0)
+or handed to the worker pool, and the delay seen by each PacketIn is
+reported as percentiles.
+
+    python3 bench_analytics.py [ports] [workers]
+"""
+import sys
+import time
+
+import numpy as np
+
+from analytics_pool import AnalyticsPool
+from anomaly_detector import AnomalyDetector
+from remediation_policy import PolicyTable, Rule
+
+PACKET_INS = 4000
+PACKET_IN_INTERVAL = 0.0005  # Seconds between two PacketIns
+STATS_EVERY = 400  # PacketIns between two stats replies
+
+
+def make_reply(ports, step):
+    port_nos = np.arange(1, ports + 1)
+    rx_bytes = port_nos * 1000 * (step + 1)
+    tx_bytes = port_nos * 500 * (step + 1)
+    return port_nos, rx_bytes, tx_bytes
+
+
+def inline_analysis(ports):
+    detector = AnomalyDetector()
+    policy = PolicyTable([Rule({'threshold': 'anomaly', 'action': 'log'})], detector.capacity_of)
+    prev = {}
+    step = [0]
+
+    def process():
+        now = time.time()
+        port_nos, rx_bytes, tx_bytes = make_reply(ports, step[0])
+        step[0] += 1
+        valid, rx_rates, tx_rates = [], [], []
+        for port_no, rx, tx in zip(port_nos.tolist(), rx_bytes.tolist(), tx_bytes.tolist()):
+            if (1, port_no) in prev:
+                prev_rx, prev_tx, prev_time = prev[(1, port_no)]
+                valid.append(port_no)
+                rx_rates.append((rx - prev_rx) / (now - prev_time))
+                tx_rates.append((tx - prev_tx) / (now - prev_time))
+            prev[(1, port_no)] = (rx, tx, now)
+        anomalous = detector.update(1, valid, rx_rates, tx_rates, now=now)
+        policy.evaluate(1, valid, rx_rates, tx_rates, anomalous)
+
+    return process, lambda: None
+
+
+def offloaded_analysis(ports, pool):
+    detector = AnomalyDetector()
+    policy = PolicyTable([Rule({'threshold': 'anomaly', 'action': 'log'})], detector.capacity_of)
+    step = [0]
+
+    def process():
+        pool.submit(1, *make_reply(ports, step[0]), time.time())
+        step[0] += 1
+
+    def collect():
+        for result in pool.poll():
+            policy.evaluate(result.dpid, result.port_nos, result.rx_rates, result.tx_rates, result.anomalous)
+
+    return process, collect
+
+
+def run(process, collect):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(PACKET_INS):
+        arrival = start + i * PACKET_IN_INTERVAL
+        while time.perf_counter() < arrival:
+            collect()
+        if i % STATS_EVERY == 0:
+            process()
+        latencies.append(time.perf_counter() - arrival)
+    return np.array(latencies) * 1000
+
+
+def report(name, latencies):
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+    print("%-10s p50 %7.3f ms  p99 %7.3f ms  p99.9 %7.3f ms  max %7.3f ms"
+          % (name, p50, p99, p999, latencies.max()))
+
+
+if __name__ == '__main__':
+    ports = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    report('inline', run(*inline_analysis(ports)))
+
+    pool = AnalyticsPool(workers)
+    try:
+        report('offloaded', run(*offloaded_analysis(ports, pool)))
+    finally:
+        pool.close()
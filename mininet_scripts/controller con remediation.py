@@ -1,35 +1,218 @@
 from ryu.base import app_manager
 from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
 from ryu.lib.packet import packet, ethernet, ether_types
 from ryu.lib import hub
+import os
+import sys
 import time
 
+from admission import DatapathAdmission, FlowModCache
+from analytics_pool import AnalyticsPool
+from anomaly_detector import AnomalyDetector
+from multipart import MultipartCollector
+from remediation_policy import PolicyTable, load_policy
+import trace_recorder
+
+# Link capacities in Mbps as configured in topology.py, keyed by (dpid, port_no)
+LINK_CAPACITY_MBPS = {
+    (1, 1): 10, (1, 2): 10,
+    (2, 1): 10, (2, 2): 5,
+    (3, 1): 10, (3, 2): 5, (3, 3): 5,
+    (4, 1): 5, (4, 2): 5,
+}
+
+# Remediation rules, reloaded whenever the file changes (see remediation_policy.py)
+POLICY_FILE = os.environ.get('POLICY_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy.json'))
+
+# Set TRACE_FILE to record the OpenFlow messages handled by the controller
+TRACE_FILE = os.environ.get('TRACE_FILE')
+
+# Number of worker processes for throughput and anomaly analytics, 0 runs them inline
+ANALYTICS_WORKERS = int(os.environ.get('ANALYTICS_WORKERS', '0'))
+
+# Seconds without a PacketIn from a MAC before it is forgotten
+MAC_AGING_TIME = 300
+
 class TrafficMonitor(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
     def __init__(self, *args, **kwargs):
         super(TrafficMonitor, self).__init__(*args, **kwargs)
         self.mac_to_port = {}
+        self.mac_last_seen = {}  # dpid -> {mac: time of its last PacketIn}
+        self.aged_macs = 0  # MACs forgotten by aging since the start
         self.datapaths = {}
-        self.monitor_thread = hub.spawn(self._monitor_traffic)
+        self.recorder = trace_recorder.TraceRecorder(TRACE_FILE) if TRACE_FILE else None
+        self.initial_flows = FlowModCache(self._build_initial_flows)
+        self.admission = DatapathAdmission(self._configure_datapath)
         self.prev_stats = {}
-        self.THROUGHPUT_THRESHOLD = 1000000  # Threshold in Bytes/sec
-        self.alarm = {}  # Dictionary to store alarms per port
+        self.multipart = MultipartCollector()  # Reassembles fragmented stats replies
+        self.detector = AnomalyDetector()  # Per-port baselines instead of a global threshold
+        self.analytics = AnalyticsPool(ANALYTICS_WORKERS) if ANALYTICS_WORKERS else None
+        self.policy = PolicyTable([], self.detector.capacity_of)
+        self.policy_mtime = None
+        self._reload_policy()
+        self.alarm = {}  # Dictionary to store the rule that fired per port
+        self.unblock_time = {}  # Dictionary to store unblock times
+        self.blocked_matches = {}  # Dictionary to store the matches installed per port
+        # Threads are started last, once every attribute they use exists
+        self.admission_thread = hub.spawn(self._admit_datapaths)
+        self.monitor_thread = hub.spawn(self._monitor_traffic)
+        if self.analytics:
+            self.analytics_thread = hub.spawn(self._collect_analytics)
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
-        datapath = ev.msg.datapath
+        # The features reply is what carries the datapath id
+        self._record_in(ev.msg, ev.msg.datapath_id)
+        # Configuration is deferred to the admission queue so that a burst of
+        # connecting switches is brought up at a bounded rate
+        self.admission.enqueue(ev.msg.datapath)
+
+    def _build_initial_flows(self, datapath):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
-        # Install table-miss flow entry
+        # Table-miss flow entry
         match = parser.OFPMatch()
         actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
-        self.datapaths[datapath.id] = datapath
+        instructions = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        return [parser.OFPFlowMod(datapath=datapath, priority=0,
+                                  match=match, instructions=instructions)]
+
+    def _configure_datapath(self, datapath):
+        bufs = self.initial_flows.send(datapath)
+        if self.recorder:
+            for buf in bufs:
+                self.recorder.record(trace_recorder.OUT, datapath.id, buf)
+
+    def stop(self):
+        super(TrafficMonitor, self).stop()
+        self.close()
+
+    def close(self):
+        # Release the worker processes and their shared memory segments
+        if self.analytics:
+            analytics, self.analytics = self.analytics, None
+            analytics.close()
+        # Write out the records still buffered by the trace recorder
+        if self.recorder:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+
+    def _record_in(self, msg, dpid=None):
+        if self.recorder:
+            self.recorder.record(trace_recorder.IN, dpid or msg.datapath.id, msg.buf)
+
+    def _send_msg(self, datapath, msg):
+        datapath.send_msg(msg)
+        if self.recorder:
+            self.recorder.record(trace_recorder.OUT, datapath.id, msg.buf)
+
+    def _admit_datapaths(self):
+        while True:
+            self.admission.admit()
+            hub.sleep(0.1)
+
+    # The barrier can be sent before ofp_handler has moved the datapath to
+    # MAIN_DISPATCHER (it waits for the port description reply), so its
+    # reply may arrive in either state
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, [CONFIG_DISPATCHER, MAIN_DISPATCHER])
+    def _barrier_reply_handler(self, ev):
+        datapath = self.admission.barrier_reply(ev.msg.datapath, ev.msg.xid)
+        if datapath is not None:
+            # Only fully configured datapaths are polled for stats
+            self.logger.info("Switch %016x configured", datapath.id)
+            self.datapaths[datapath.id] = datapath
+            for (dpid, port_no), capacity in LINK_CAPACITY_MBPS.items():
+                if dpid == datapath.id:
+                    self.detector.set_link_capacity(dpid, port_no, capacity)
+                    if self.analytics:
+                        self.analytics.set_link_capacity(dpid, port_no, capacity)
+
+    @set_ev_cls(ofp_event.EventOFPStateChange, DEAD_DISPATCHER)
+    def _state_change_handler(self, ev):
+        datapath = ev.datapath
+        dpid = datapath.id
+        if dpid is None:
+            return  # Disconnected before the features reply
+
+        # The switch may already have reconnected: the new connection is
+        # either admitted or still being configured, and owns the per-dpid
+        # state from now on
+        reconnected = (self.datapaths.get(dpid, datapath) is not datapath
+                       or self.admission.has_newer(datapath))
+        self.admission.forget(datapath)
+        if self.datapaths.get(dpid) is datapath:
+            del self.datapaths[dpid]
+        if reconnected:
+            self.logger.info("Old connection of switch %016x closed, switch already reconnected", dpid)
+            return
+
+        self.logger.info("Switch %016x disconnected, dropping its state", dpid)
+        self.mac_to_port.pop(dpid, None)
+        self.mac_last_seen.pop(dpid, None)
+        self.multipart.forget(dpid)
+        self.detector.forget(dpid)
+        if self.analytics:
+            self.analytics.forget(dpid)
+        self.policy.forget(dpid)
+        for table in (self.prev_stats, self.alarm, self.unblock_time, self.blocked_matches):
+            for key in [key for key in table if key[0] == dpid]:
+                del table[key]
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def _port_status_handler(self, ev):
+        msg = ev.msg
+        dpid = msg.datapath.id
+        ofproto = msg.datapath.ofproto
+        port_no = msg.desc.port_no
+
+        # Counters are not comparable across a port state change, so the next
+        # sample starts a new baseline instead of producing a bogus rate
+        self.prev_stats.pop((dpid, port_no), None)
+        self.detector.reset(dpid, port_no)
+        if self.analytics:
+            self.analytics.reset(dpid, port_no)
+
+        if msg.reason == ofproto.OFPPR_DELETE or msg.desc.state & ofproto.OFPPS_LINK_DOWN:
+            self.logger.info("Port %d of switch %016x down, dropping its state", port_no, dpid)
+            macs = self.mac_to_port.get(dpid, {})
+            last_seen = self.mac_last_seen.get(dpid, {})
+            for mac in [mac for mac, port in macs.items() if port == port_no]:
+                del macs[mac]
+                last_seen.pop(mac, None)
+        if msg.reason == ofproto.OFPPR_DELETE:
+            for table in (self.alarm, self.unblock_time, self.blocked_matches):
+                table.pop((dpid, port_no), None)
+
+    def memory_stats(self):
+        """Entry counts and approximate size in bytes of the per-switch state."""
+        tables = {
+            'datapaths': self.datapaths,
+            'mac_to_port': self.mac_to_port,
+            'mac_last_seen': self.mac_last_seen,
+            'prev_stats': self.prev_stats,
+            'alarm': self.alarm,
+            'unblock_time': self.unblock_time,
+            'blocked_matches': self.blocked_matches,
+        }
+        stats = {name: len(table) for name, table in tables.items()}
+        stats['mac_entries'] = sum(len(macs) for macs in self.mac_to_port.values())
+        stats['aged_macs'] = self.aged_macs
+        stats['detector_ports'] = len(self.detector.index)
+        stats['partial_replies'] = len(self.multipart.partial)
+        stats['expired_replies'] = len(self.multipart.expired)
+        stats['pending_analytics'] = len(self.analytics.segments) if self.analytics else 0
+        stats['pending_admission'] = len(self.admission.queue) + len(self.admission.pending)
+        stats['bytes'] = (sum(sys.getsizeof(table) for table in tables.values())
+                          + sum(sys.getsizeof(macs) for macs in self.mac_to_port.values())
+                          + sum(sys.getsizeof(macs) for macs in self.mac_last_seen.values())
+                          + self.detector.nbytes())
+        return stats
 
     def add_flow(self, datapath, priority, match, actions, buffer_id=None):
         ofproto = datapath.ofproto
@@ -43,11 +226,12 @@ class TrafficMonitor(app_manager.RyuApp):
         else:
             flow_mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                          match=match, instructions=instructions)
-        datapath.send_msg(flow_mod)
+        self._send_msg(datapath, flow_mod)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
         msg = ev.msg
+        self._record_in(msg)
         datapath = msg.datapath
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
@@ -63,6 +247,7 @@ class TrafficMonitor(app_manager.RyuApp):
         src = eth.src
         dpid = datapath.id
         self.mac_to_port.setdefault(dpid, {})
+        self.mac_last_seen.setdefault(dpid, {})[src] = time.time()
 
         self.logger.info("Packet in: switch=%s, src=%s, dst=%s, in_port=%s", dpid, src, dst, in_port)
         self.mac_to_port[dpid][src] = in_port
@@ -88,14 +273,30 @@ class TrafficMonitor(app_manager.RyuApp):
 
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
                                   in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
+        self._send_msg(datapath, out)
 
     def _monitor_traffic(self):
         while True:
-            for dp in self.datapaths.values():
+            for dp in list(self.datapaths.values()):
                 self._request_port_stats(dp)
+            self._reload_policy()
+            self._age_macs()
+            for dpid, xid in self.multipart.expire():
+                self.logger.warning("Incomplete stats reply %d from switch %016x discarded", xid, dpid)
+            self.logger.debug("Controller state: %s", self.memory_stats())
             hub.sleep(10)  # Monitor every 10 seconds
 
+    def _age_macs(self):
+        # Hosts that left behind a port that stays up (e.g. the s3 trunks)
+        # are never reported by a port status, so they are aged out instead
+        expiry = time.time() - MAC_AGING_TIME
+        for dpid, last_seen in self.mac_last_seen.items():
+            macs = self.mac_to_port.get(dpid, {})
+            for mac in [mac for mac, seen in last_seen.items() if seen < expiry]:
+                del last_seen[mac]
+                macs.pop(mac, None)
+                self.aged_macs += 1
+
     def _request_port_stats(self, datapath):
         self.logger.debug('Sending stats request: %016x', datapath.id)
         ofproto = datapath.ofproto
@@ -103,9 +304,8 @@ class TrafficMonitor(app_manager.RyuApp):
         request = parser.OFPPortStatsRequest(datapath, 0, ofproto.OFPP_ANY)
         datapath.send_msg(request)
 
-    def _calculate_throughput(self, dpid, port_no, rx_bytes, tx_bytes, prev_stats):
+    def _calculate_throughput(self, dpid, port_no, rx_bytes, tx_bytes, prev_stats, current_time):
         prev_rx_bytes, prev_tx_bytes, prev_time = prev_stats
-        current_time = time.time()
         interval = current_time - prev_time
 
         rx_throughput = (rx_bytes - prev_rx_bytes) / interval
@@ -120,28 +320,91 @@ class TrafficMonitor(app_manager.RyuApp):
 
         return rx_throughput, tx_throughput
 
-    def _handle_threshold_exceed(self, datapath, port_no):
-        self.logger.info("ALERT: High throughput detected on switch %016x port %d", datapath.id, port_no)
-        self.alarm[(datapath.id, port_no)] = True
-        self.add_block_flow(datapath, port_no)
-
-    def add_block_flow(self, datapath, port_no):
+    def _reload_policy(self):
+        try:
+            mtime = os.path.getmtime(POLICY_FILE)
+        except OSError:
+            return
+        if mtime == self.policy_mtime:
+            return
+        self.policy_mtime = mtime
+        try:
+            rules = load_policy(POLICY_FILE)
+        except (OSError, ValueError) as e:
+            self.logger.error("Invalid policy file %s, keeping the previous rules: %s", POLICY_FILE, e)
+            return
+        # Active remediations keep the rule that triggered them until lifted
+        self.policy = PolicyTable(rules, self.detector.capacity_of)
+        self.logger.info("Loaded %d remediation rules from %s", len(rules), POLICY_FILE)
+
+    def _handle_threshold_exceed(self, datapath, port_no, rule):
+        self.logger.info("ALERT: High throughput detected on switch %016x port %d (%s -> %s)",
+                         datapath.id, port_no, rule.threshold, rule.action)
+        # The alarm is only raised once the remediation is in place, so a
+        # port with nothing to remediate yet is tried again on the next poll
+        if rule.action != 'log' and not self.add_block_flow(datapath, port_no, rule):
+            return
+        self.alarm[(datapath.id, port_no)] = rule
+        if rule.cooldown is not None:
+            self.unblock_time[(datapath.id, port_no)] = time.time() + rule.cooldown
+
+    def _handle_threshold_below(self, datapath, port_no):
+        key = (datapath.id, port_no)
+        if key in self.unblock_time and time.time() > self.unblock_time[key]:
+            self.logger.info("Throughput back under threshold for switch %016x port %d, unblock time reached.", datapath.id, port_no)
+            self.unblock_port(datapath, port_no)
+            del self.alarm[key]
+            del self.unblock_time[key]
+
+    def _rule_matches(self, datapath, port_no, rule):
+        parser = datapath.ofproto_parser
+        if rule.scope == 'mac':
+            macs = self.mac_to_port.get(datapath.id, {})
+            return [parser.OFPMatch(in_port=port_no, eth_src=mac)
+                    for mac, port in macs.items() if port == port_no]
+        if rule.scope == 'flow':
+            return [parser.OFPMatch(in_port=port_no, **rule.match)]
+        return [parser.OFPMatch(in_port=port_no)]
+
+    def add_block_flow(self, datapath, port_no, rule):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
+        priority = 100
+
+        matches = self._rule_matches(datapath, port_no, rule)
+        if not matches:
+            self.logger.warning("No MAC learned on port %d of switch %016x, nothing to remediate", port_no, datapath.id)
+            return False
+
+        if rule.scope == 'port':
+            # Remove existing flows that might cause conflicts
+            self._remove_existing_flows(datapath, port_no)
+
+        if rule.action == 'meter':
+            # Meter id is the port number, one meter per remediated port
+            bands = [parser.OFPMeterBandDrop(rate=int(rule.rate_mbps * 1000), burst_size=0)]
+            meter_mod = parser.OFPMeterMod(datapath=datapath, command=ofproto.OFPMC_ADD,
+                                           flags=ofproto.OFPMF_KBPS, meter_id=port_no, bands=bands)
+            self._send_msg(datapath, meter_mod)
+            instructions = [parser.OFPInstructionMeter(port_no),
+                            parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS,
+                                                         [parser.OFPActionOutput(ofproto.OFPP_NORMAL)])]
+        elif rule.action == 'reroute':
+            instructions = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS,
+                                                         [parser.OFPActionOutput(rule.out_port)])]
+        else:
+            instructions = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, [])]  # Empty actions list means drop
 
-        # Remove existing flows that might cause conflicts
-        self._remove_existing_flows(datapath, port_no)
-
-        # Block traffic on the specific port
-        match = parser.OFPMatch(in_port=port_no)
-        actions = []  # Empty actions list means drop
-        priority = 10
+        for match in matches:
+            flow_mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
+                                         match=match, instructions=instructions)
+            self._send_msg(datapath, flow_mod)
 
-        flow_mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
-                                     match=match, instructions=[parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)])
-        datapath.send_msg(flow_mod)
+        # Save the matches for later unblock
+        self.blocked_matches[(datapath.id, port_no)] = matches
 
-        self.logger.info("Blocking traffic on port %d of switch %016x", port_no, datapath.id)
+        self.logger.info("Applied %s (%s scope) on port %d of switch %016x", rule.action, rule.scope, port_no, datapath.id)
+        return True
 
     def _remove_existing_flows(self, datapath, port_no):
         ofproto = datapath.ofproto
@@ -149,31 +412,90 @@ class TrafficMonitor(app_manager.RyuApp):
 
         # Create a request to remove existing flows on the port
         match = parser.OFPMatch(in_port=port_no)
-        flow_mod = parser.OFPFlowMod(datapath=datapath, priority=0, 
-                                     match=match, instructions=[], 
-                                     command=ofproto.OFPMC_DELETE)
-        datapath.send_msg(flow_mod)
+        flow_mod = parser.OFPFlowMod(datapath=datapath, priority=0,
+                                     match=match, instructions=[],
+                                     command=ofproto.OFPFC_DELETE,
+                                     out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY)
+        self._send_msg(datapath, flow_mod)
+
+    def unblock_port(self, datapath, port_no):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        rule = self.alarm.get((datapath.id, port_no))
+
+        matches = self.blocked_matches.pop((datapath.id, port_no), [])
+        for match in matches:
+            mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_DELETE_STRICT,
+                                    out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY,
+                                    match=match, priority=100)
+            self._send_msg(datapath, mod)
+        if matches and rule is not None and rule.action == 'meter':
+            meter_mod = parser.OFPMeterMod(datapath=datapath, command=ofproto.OFPMC_DELETE, meter_id=port_no)
+            self._send_msg(datapath, meter_mod)
+        if matches:
+            self.logger.info("Remediation lifted on port %d of switch %016x", port_no, datapath.id)
 
     @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
     def _port_stats_reply_handler(self, ev):
-        body = ev.msg.body
-        dpid = ev.msg.datapath.id
+        self._record_in(ev.msg)
+        # Wait for the last fragment so that all the ports of a poll share
+        # the same timestamp
+        batch = self.multipart.add(ev.msg)
+        if batch is None:
+            return
+        dpid = batch.datapath.id
+        now = batch.timestamp
 
-        for stat in sorted(body, key=lambda x: x.port_no):
-            port_no = stat.port_no
-            rx_bytes = stat.rx_bytes
-            tx_bytes = stat.tx_bytes
+        if self.analytics:
+            # Only the copy into shared memory happens on the hub, the
+            # decisions come back through _collect_analytics
+            self.analytics.submit(dpid, *batch.columns('port_no', 'rx_bytes', 'tx_bytes'), now)
+            return
 
+        port_nos = []
+        rx_rates = []
+        tx_rates = []
+        for port_no, rx_bytes, tx_bytes in sorted(zip(*batch.columns('port_no', 'rx_bytes', 'tx_bytes'))):
+            port_no, rx_bytes, tx_bytes = int(port_no), int(rx_bytes), int(tx_bytes)
             if (dpid, port_no) in self.prev_stats:
-                rx_throughput, tx_throughput = self._calculate_throughput(dpid, port_no, rx_bytes, tx_bytes, self.prev_stats[(dpid, port_no)])
-
-                if rx_throughput > self.THROUGHPUT_THRESHOLD or tx_throughput > self.THROUGHPUT_THRESHOLD:
-                    if not self.alarm.get((dpid, port_no), False):
-                        self._handle_threshold_exceed(ev.msg.datapath, port_no)
-                else:
-                    if self.alarm.get((dpid, port_no), False):
-                        self.alarm[(dpid, port_no)] = False
-                        self.logger.info("Throughput back under threshold for switch %016x port %d, alarm deactivated.", dpid, port_no)
-
-            self.prev_stats[(dpid, port_no)] = (rx_bytes, tx_bytes, time.time())
-
+                rx_throughput, tx_throughput = self._calculate_throughput(dpid, port_no, rx_bytes, tx_bytes, self.prev_stats[(dpid, port_no)], now)
+                port_nos.append(port_no)
+                rx_rates.append(rx_throughput)
+                tx_rates.append(tx_throughput)
+
+            self.prev_stats[(dpid, port_no)] = (rx_bytes, tx_bytes, now)
+
+        # Evaluate every port of the reply in a single pass, then look up
+        # the compiled rule of each port
+        anomalous = self.detector.update(dpid, port_nos, rx_rates, tx_rates)
+        self._apply_policy(batch.datapath, port_nos, rx_rates, tx_rates, anomalous)
+
+    def _collect_analytics(self):
+        # Ends once close() or a worker failure has dropped the pool
+        while self.analytics:
+            analytics = self.analytics
+            if not analytics.alive():
+                dead = [process.pid for process in analytics.processes if not process.is_alive()]
+                self.logger.error("Analytics workers %s died, falling back to inline analytics", dead)
+                self.analytics = None
+                analytics.close()
+                return
+            for result in analytics.poll():
+                datapath = self.datapaths.get(result.dpid)
+                if datapath is None:
+                    continue  # Disconnected while the batch was being analysed
+                self.logger.info("Busiest ports on switch %016x: %s", result.dpid,
+                                 ", ".join("%d %.2f Mbps" % (port_no, rate * 8 / 1_000_000) for port_no, rate in result.top))
+                self._apply_policy(datapath, result.port_nos, result.rx_rates, result.tx_rates, result.anomalous)
+            hub.sleep(0.05)
+
+    def _apply_policy(self, datapath, port_nos, rx_rates, tx_rates, anomalous):
+        dpid = datapath.id
+        rules, exceeded = self.policy.evaluate(dpid, port_nos, rx_rates, tx_rates, anomalous)
+
+        for port_no, rule, is_exceeded in zip(port_nos, rules, exceeded):
+            if is_exceeded:
+                if (dpid, port_no) not in self.alarm:
+                    self._handle_threshold_exceed(datapath, port_no, rule)
+            elif (dpid, port_no) in self.alarm:
+                self._handle_threshold_below(datapath, port_no)
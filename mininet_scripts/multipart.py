@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+
+OFPMPF_REPLY_MORE = 1  # Same value in every OpenFlow version with multipart replies
+
+
+class MultipartBatch(object):
+    """All the fragments of one multipart reply, merged into a single body."""
+
+    def __init__(self, datapath, msg_type, xid, timestamp):
+        self.datapath = datapath
+        self.type = msg_type  # OFPMP_* type of the reply (port, flow, meter stats...)
+        self.xid = xid
+        self.timestamp = timestamp  # Arrival of the first fragment, shared by the whole batch
+        self.body = []
+
+    def columns(self, *fields):
+        """Return one numpy array per requested field of the body entries."""
+        return [np.array([getattr(stat, field) for stat in self.body]) for field in fields]
+
+
+class MultipartCollector(object):
+    """Reassemble multipart replies fragmented with OFPMPF_REPLY_MORE.
+
+    Fragments are grouped by (dpid, xid), so the same collector can serve
+    port, flow and meter stats. ``add`` returns the complete batch once the
+    last fragment arrives; ``expire`` drops replies whose remaining
+    fragments never showed up. The keys of dropped replies are remembered
+    for ``straggler_ttl`` seconds, so fragments arriving after the timeout
+    are discarded instead of starting a new, truncated batch.
+    """
+
+    def __init__(self, timeout=5.0, straggler_ttl=60.0):
+        self.timeout = timeout
+        self.straggler_ttl = straggler_ttl
+        self.partial = {}  # (dpid, xid) -> MultipartBatch still missing fragments
+        self.expired = {}  # (dpid, xid) -> time its batch was dropped by expire
+
+    def add(self, msg):
+        key = (msg.datapath.id, msg.xid)
+        if key in self.expired:
+            if not msg.flags & OFPMPF_REPLY_MORE:
+                del self.expired[key]  # Last straggler, nothing more to wait for
+            return None
+        batch = self.partial.get(key)
+        if batch is None:
+            batch = MultipartBatch(msg.datapath, msg.type, msg.xid, time.time())
+        batch.body.extend(msg.body)
+
+        if msg.flags & OFPMPF_REPLY_MORE:
+            self.partial[key] = batch
+            return None
+        self.partial.pop(key, None)
+        return batch
+
+    def expire(self, now=None):
+        if now is None:
+            now = time.time()
+        expired = [key for key, batch in self.partial.items()
+                   if now - batch.timestamp > self.timeout]
+        for key in expired:
+            del self.partial[key]
+            self.expired[key] = now
+        for key in [key for key, dropped in self.expired.items()
+                    if now - dropped > self.straggler_ttl]:
+            del self.expired[key]
+        return expired
+
+    def forget(self, dpid):
+        for key in [key for key in self.partial if key[0] == dpid]:
+            del self.partial[key]
+        for key in [key for key in self.expired if key[0] == dpid]:
+            del self.expired[key]
@@ -0,0 +1,184 @@
+import json
+import re
+
+import numpy as np
+
+SCOPES = ('port', 'mac', 'flow')
+ACTIONS = ('drop', 'meter', 'reroute', 'log')
+
+# Per-port quantities a threshold can refer to, in the order they are
+# stacked by PolicyTable.evaluate
+METRICS = {'rx': 0, 'tx': 1, 'max': 2, 'total': 3, 'anomaly': 4}
+
+FIELDS = ('dpid', 'port', 'scope', 'threshold', 'action', 'cooldown', 'match', 'rate_mbps', 'out_port')
+
+# OpenFlow 1.3 match fields usable in a flow-scope rule. in_port is left
+# out: it is always set to the remediated port
+MATCH_FIELDS = frozenset((
+    'in_phy_port', 'metadata', 'eth_dst', 'eth_src', 'eth_type',
+    'vlan_vid', 'vlan_pcp', 'ip_dscp', 'ip_ecn', 'ip_proto',
+    'ipv4_src', 'ipv4_dst', 'tcp_src', 'tcp_dst', 'udp_src', 'udp_dst',
+    'sctp_src', 'sctp_dst', 'icmpv4_type', 'icmpv4_code',
+    'arp_op', 'arp_spa', 'arp_tpa', 'arp_sha', 'arp_tha',
+    'ipv6_src', 'ipv6_dst', 'ipv6_flabel', 'icmpv6_type', 'icmpv6_code',
+    'ipv6_nd_target', 'ipv6_nd_sll', 'ipv6_nd_tll',
+    'mpls_label', 'mpls_tc', 'mpls_bos', 'pbb_isid', 'tunnel_id', 'ipv6_exthdr',
+))
+
+# "<metric> > <value>[unit]", e.g. "max > 80%", "total > 8Mbps", "rx > 500000"
+THRESHOLD = re.compile(r'^\s*(rx|tx|max|total)\s*>\s*([0-9.]+)\s*(%|Mbps|Kbps|B/s)?\s*$')
+
+
+class Rule(object):
+    """One remediation rule of a policy file.
+
+    A rule is a JSON object with the keys:
+
+    - ``dpid`` / ``port``: switch and port it applies to, ``"*"`` (default)
+      for any;
+    - ``scope``: what is remediated, ``port`` (all traffic entering the
+      port), ``mac`` (traffic from the MACs learned on the port) or
+      ``flow`` (the OpenFlow fields given in ``match``, on the port);
+    - ``threshold``: ``"anomaly"`` to follow the baseline detector, or
+      ``"<rx|tx|max|total> > <value>"`` with the value in Bytes/sec or
+      suffixed with ``%`` (of link capacity), ``Mbps`` or ``Kbps``;
+    - ``action``: ``drop``, ``meter`` (needs ``rate_mbps``), ``reroute``
+      (needs ``out_port``) or ``log``;
+    - ``cooldown``: seconds after which the remediation is lifted once the
+      port is back under the threshold; omitted means permanent.
+
+    Rules are tried in file order and the first one matching a port wins.
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("A rule must be an object, got %r" % (spec,))
+        unknown = set(spec) - set(FIELDS)
+        if unknown:
+            raise ValueError("Unknown rule fields %s" % ', '.join(sorted(unknown)))
+
+        self.dpid = self._wildcard('dpid', spec.get('dpid', '*'))
+        self.port = self._wildcard('port', spec.get('port', '*'))
+        self.scope = spec.get('scope', 'port')
+        self.action = spec.get('action', 'drop')
+        self.cooldown = spec.get('cooldown')
+        self.match = spec.get('match', {})
+        self.rate_mbps = spec.get('rate_mbps')
+        self.out_port = spec.get('out_port')
+
+        if self.cooldown is not None and (not _is_number(self.cooldown) or self.cooldown < 0):
+            raise ValueError("cooldown must be a non-negative number, got %r" % (self.cooldown,))
+        if not isinstance(self.match, dict):
+            raise ValueError("match must be an object of OpenFlow fields, got %r" % (self.match,))
+        for field, value in self.match.items():
+            if field == 'in_port':
+                raise ValueError("match cannot set in_port, it is always the remediated port")
+            if field not in MATCH_FIELDS:
+                raise ValueError("Unknown OpenFlow match field %r" % field)
+            if not (_is_int(value) or isinstance(value, str)):
+                raise ValueError("match field %s must be an integer or a string, got %r" % (field, value))
+        if self.rate_mbps is not None and (not _is_number(self.rate_mbps) or self.rate_mbps <= 0):
+            raise ValueError("rate_mbps must be a positive number, got %r" % (self.rate_mbps,))
+        if self.out_port is not None and not _is_int(self.out_port):
+            raise ValueError("out_port must be an integer, got %r" % (self.out_port,))
+        if self.scope not in SCOPES:
+            raise ValueError("Unknown scope %r" % self.scope)
+        if self.action not in ACTIONS:
+            raise ValueError("Unknown action %r" % self.action)
+        if self.action == 'meter' and self.rate_mbps is None:
+            raise ValueError("Action 'meter' needs rate_mbps")
+        if self.action == 'reroute' and self.out_port is None:
+            raise ValueError("Action 'reroute' needs out_port")
+
+        threshold = spec.get('threshold', 'anomaly')
+        if not isinstance(threshold, str):
+            raise ValueError("threshold must be a string, got %r" % (threshold,))
+        if threshold.strip() == 'anomaly':
+            self.metric, self.value, self.unit = 'anomaly', 0.5, None
+        else:
+            parsed = THRESHOLD.match(threshold)
+            if parsed is None:
+                raise ValueError("Invalid threshold %r" % threshold)
+            self.metric, self.value, self.unit = parsed.group(1), float(parsed.group(2)), parsed.group(3)
+        self.threshold = threshold
+
+    @staticmethod
+    def _wildcard(field, value):
+        if value == '*':
+            return None
+        if not _is_int(value):
+            raise ValueError("%s must be an integer or \"*\", got %r" % (field, value))
+        return value
+
+    def applies_to(self, dpid, port_no):
+        return (self.dpid is None or self.dpid == dpid) and (self.port is None or self.port == port_no)
+
+    def limit(self, capacity):
+        """Threshold in Bytes/sec for a link of the given capacity (Bytes/sec)."""
+        if self.unit == '%':
+            return self.value / 100 * capacity
+        if self.unit == 'Mbps':
+            return self.value * 1_000_000 / 8
+        if self.unit == 'Kbps':
+            return self.value * 1_000 / 8
+        return self.value
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def load_policy(path):
+    """Parse a policy file, raising ValueError if it is not a valid policy."""
+    with open(path) as f:
+        policy = json.load(f)
+    if not isinstance(policy, dict) or not isinstance(policy.get('rules'), list):
+        raise ValueError("A policy must be an object with a \"rules\" list")
+    return [Rule(spec) for spec in policy['rules']]
+
+
+class PolicyTable(object):
+    """Rules compiled into a lookup table indexed by (dpid, port_no).
+
+    The first time a port is seen its winning rule is resolved and stored
+    together with its metric index and absolute limit, so evaluating a stats
+    reply is a dictionary lookup per port followed by one vectorized
+    comparison.
+    """
+
+    def __init__(self, rules, capacity_of):
+        self.rules = rules
+        self.capacity_of = capacity_of  # (dpid, port_no) -> link capacity in Bytes/sec
+        self.table = {}  # (dpid, port_no) -> (rule, metric index, limit)
+
+    def lookup(self, dpid, port_no):
+        entry = self.table.get((dpid, port_no))
+        if entry is None:
+            entry = (None, 0, np.inf)
+            for rule in self.rules:
+                if rule.applies_to(dpid, port_no):
+                    entry = (rule, METRICS[rule.metric], rule.limit(self.capacity_of(dpid, port_no)))
+                    break
+            self.table[(dpid, port_no)] = entry
+        return entry
+
+    def evaluate(self, dpid, port_nos, rx_rates, tx_rates, anomalous):
+        """Return the rule of each port and whether its threshold is exceeded."""
+        entries = [self.lookup(dpid, port_no) for port_no in port_nos]
+        if not entries:
+            return [], np.zeros(0, dtype=bool)
+        rules, metrics, limits = zip(*entries)
+
+        rx = np.asarray(rx_rates, dtype=float)
+        tx = np.asarray(tx_rates, dtype=float)
+        values = np.stack((rx, tx, np.maximum(rx, tx), rx + tx, np.asarray(anomalous, dtype=float)))
+        exceeded = values[np.array(metrics), np.arange(len(entries))] > np.array(limits)
+        return rules, exceeded
+
+    def forget(self, dpid):
+        for key in [key for key in self.table if key[0] == dpid]:
+            del self.table[key]
@@ -0,0 +1,150 @@
+import itertools
+
+import admission
+from admission import DatapathAdmission, FlowModCache
+
+xids = itertools.count(1)
+
+
+class Barrier(object):
+
+    def __init__(self, datapath):
+        self.xid = next(xids)
+
+
+class Parser(object):
+    OFPBarrierRequest = Barrier
+
+
+class Ofproto(object):
+    OFP_VERSION = 4
+
+
+class Datapath(object):
+    ofproto = Ofproto
+    ofproto_parser = Parser
+
+    def __init__(self, dpid, is_active=True):
+        self.id = dpid
+        self.is_active = is_active
+        self.sent = []
+
+    def send_msg(self, msg):
+        self.sent.append(msg)
+
+    def send(self, buf):
+        self.sent.append(buf)
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def admission_with_clock(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, 'monotonic', clock)
+    configured = []
+    return DatapathAdmission(configured.append, **kwargs), configured, clock
+
+
+def test_admit_is_paced_by_the_token_bucket(monkeypatch):
+    adm, configured, clock = admission_with_clock(monkeypatch, rate=10, burst=3)
+    for dpid in range(1, 11):
+        adm.enqueue(Datapath(dpid))
+
+    assert adm.admit() == 3  # Initial burst
+    assert adm.admit() == 0  # No time has passed, no token left
+    clock.now += 0.25
+    assert adm.admit() == 2
+    clock.now += 10
+    assert adm.admit() == 3  # Refill is capped at the burst
+    assert [dp.id for dp in configured] == list(range(1, 9))
+    assert sorted(adm.pending) == list(range(1, 9))
+
+
+def test_inactive_datapaths_do_not_use_tokens(monkeypatch):
+    adm, configured, _ = admission_with_clock(monkeypatch, rate=10, burst=1)
+    adm.enqueue(Datapath(1, is_active=False))
+    adm.enqueue(Datapath(2))
+
+    assert adm.admit() == 1
+    assert [dp.id for dp in configured] == [2]
+
+
+def test_barrier_reply_with_stale_xid_is_ignored(monkeypatch):
+    adm, _, _ = admission_with_clock(monkeypatch)
+    datapath = Datapath(1)
+    adm.enqueue(datapath)
+    adm.admit()
+    xid = datapath.sent[-1].xid
+
+    assert adm.barrier_reply(datapath, xid - 1) is None
+    assert adm.barrier_reply(Datapath(2), xid) is None
+    assert adm.barrier_reply(datapath, xid) is datapath
+    assert adm.barrier_reply(datapath, xid) is None  # Already admitted
+    assert adm.pending == {}
+
+
+def test_forget_leaves_a_reconnection_alone(monkeypatch):
+    adm, _, _ = admission_with_clock(monkeypatch)
+    old, new = Datapath(1), Datapath(1)
+    adm.enqueue(old)
+    adm.admit()
+    adm.enqueue(new)
+
+    # The new connection is still queued behind the old one's barrier
+    assert adm.has_newer(old)
+    adm.forget(old)
+    assert 1 not in adm.pending
+    assert list(adm.queue) == [new]
+
+    adm.admit()
+    assert adm.has_newer(old)
+    adm.forget(old)  # Late death notification of the old connection
+    assert adm.pending[1][0] is new
+    assert adm.barrier_reply(new, new.sent[-1].xid) is new
+
+
+def test_forget_drops_a_queued_connection(monkeypatch):
+    adm, _, _ = admission_with_clock(monkeypatch)
+    datapath = Datapath(1)
+    adm.enqueue(datapath)
+    adm.forget(datapath)
+
+    assert adm.admit() == 0
+    assert not adm.has_newer(datapath)
+
+
+class FlowMod(object):
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.xid = None
+        self.buf = None
+
+    def set_xid(self, xid):
+        self.xid = xid
+
+    def serialize(self):
+        self.buf = bytearray(self.payload + bytes([self.xid]))
+
+
+def test_flow_mods_are_serialized_once_per_version():
+    built = []
+
+    def build(datapath):
+        built.append(datapath.id)
+        return [FlowMod(b'miss')]
+
+    cache = FlowModCache(build)
+    first, second = Datapath(1), Datapath(2)
+    cache.send(first)
+    cache.send(second)
+
+    assert built == [1]
+    assert first.sent == second.sent == [b'miss\x00']
@@ -0,0 +1,33 @@
+from anomaly_detector import AnomalyDetector
+
+MBPS = 1_000_000 / 8  # Bytes/sec in one Mbit/s
+
+
+def feed(detector, rates):
+    return [bool(detector.update(1, [1], [rate], [0])[0]) for rate in rates]
+
+
+def test_steady_traffic_after_idle_is_rebaselined():
+    detector = AnomalyDetector()
+    detector.set_link_capacity(1, 1, 10)
+    flags = feed(detector, [0] * 4 + [1.6 * MBPS] * 20)
+
+    assert not any(flags[:4])
+    assert flags[4]  # The jump from idle is reported...
+    assert not any(flags[-10:])  # ...but the new level becomes the baseline
+
+
+def test_small_step_on_steady_traffic_is_not_anomalous():
+    detector = AnomalyDetector()
+    detector.set_link_capacity(1, 1, 10)
+    flags = feed(detector, [2.0 * MBPS] * 5 + [2.1 * MBPS] * 10)
+
+    assert not any(flags)
+
+
+def test_sustained_over_capacity_stays_anomalous():
+    detector = AnomalyDetector()
+    detector.set_link_capacity(1, 1, 10)
+    flags = feed(detector, [1 * MBPS] * 5 + [9 * MBPS] * 20)
+
+    assert all(flags[5:])
@@ -0,0 +1,86 @@
+from multipart import OFPMPF_REPLY_MORE, MultipartCollector
+
+OFPMP_PORT_STATS = 4
+
+
+class Datapath(object):
+
+    def __init__(self, dpid):
+        self.id = dpid
+
+
+class PortStats(object):
+
+    def __init__(self, port_no, rx_bytes, tx_bytes):
+        self.port_no = port_no
+        self.rx_bytes = rx_bytes
+        self.tx_bytes = tx_bytes
+
+
+class Reply(object):
+
+    def __init__(self, datapath, xid, body, more):
+        self.datapath = datapath
+        self.type = OFPMP_PORT_STATS
+        self.xid = xid
+        self.body = body
+        self.flags = OFPMPF_REPLY_MORE if more else 0
+
+
+def test_fragments_are_reassembled():
+    collector = MultipartCollector()
+    datapath = Datapath(1)
+
+    assert collector.add(Reply(datapath, 7, [PortStats(1, 10, 20)], more=True)) is None
+    assert collector.add(Reply(Datapath(2), 7, [PortStats(9, 0, 0)], more=True)) is None
+    batch = collector.add(Reply(datapath, 7, [PortStats(2, 30, 40), PortStats(3, 50, 60)], more=False))
+
+    assert batch.datapath is datapath
+    assert batch.xid == 7
+    port_nos, rx_bytes, tx_bytes = batch.columns('port_no', 'rx_bytes', 'tx_bytes')
+    assert port_nos.tolist() == [1, 2, 3]
+    assert rx_bytes.tolist() == [10, 30, 50]
+    assert tx_bytes.tolist() == [20, 40, 60]
+    assert list(collector.partial) == [(2, 7)]  # The other switch is still pending
+
+
+def test_incomplete_reply_expires():
+    collector = MultipartCollector(timeout=5.0)
+    collector.add(Reply(Datapath(1), 7, [PortStats(1, 10, 20)], more=True))
+    started = collector.partial[(1, 7)].timestamp
+
+    assert collector.expire(now=started + 4) == []
+    assert collector.expire(now=started + 6) == [(1, 7)]
+    assert collector.partial == {}
+
+
+def test_stragglers_of_an_expired_reply_are_discarded():
+    collector = MultipartCollector(timeout=5.0, straggler_ttl=60.0)
+    datapath = Datapath(1)
+    collector.add(Reply(datapath, 7, [PortStats(1, 10, 20)], more=True))
+    started = collector.partial[(1, 7)].timestamp
+    collector.expire(now=started + 6)
+
+    # Late fragments must not start a truncated batch of their own
+    assert collector.add(Reply(datapath, 7, [PortStats(2, 30, 40)], more=True)) is None
+    assert collector.partial == {}
+    assert collector.add(Reply(datapath, 7, [PortStats(3, 50, 60)], more=False)) is None
+    assert collector.expired == {}
+
+    # Other replies of the same switch are unaffected
+    batch = collector.add(Reply(datapath, 8, [PortStats(1, 10, 20)], more=False))
+    assert batch.xid == 8
+
+
+def test_expired_keys_are_pruned():
+    collector = MultipartCollector(timeout=5.0, straggler_ttl=60.0)
+    collector.add(Reply(Datapath(1), 7, [], more=True))
+    collector.add(Reply(Datapath(2), 7, [], more=True))
+    started = collector.partial[(1, 7)].timestamp
+    collector.expire(now=started + 6)
+    assert sorted(collector.expired) == [(1, 7), (2, 7)]
+
+    collector.forget(2)
+    assert list(collector.expired) == [(1, 7)]
+    collector.expire(now=started + 100)
+    assert collector.expired == {}
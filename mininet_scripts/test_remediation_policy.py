@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from remediation_policy import Rule, load_policy
+
+
+def write_policy(tmp_path, policy):
+    path = tmp_path / 'policy.json'
+    path.write_text(json.dumps(policy))
+    return str(path)
+
+
+def test_shipped_policy_loads():
+    assert load_policy(os.path.join(os.path.dirname(__file__), 'policy.json'))
+
+
+@pytest.mark.parametrize('policy', [
+    [],
+    {'rules': {'threshold': 'anomaly'}},
+    {'rules': ['drop']},
+    {'rules': [{'threshold': 5000000}]},
+    {'rules': [{'dpid': None}]},
+    {'rules': [{'port': '2'}]},
+    {'rules': [{'cooldown': '60'}]},
+    {'rules': [{'cooldown': -1}]},
+    {'rules': [{'action': 'meter', 'rate_mbps': 'fast'}]},
+    {'rules': [{'action': 'reroute', 'out_port': 2.5}]},
+    {'rules': [{'scope': 'flow', 'match': ['eth_type']}]},
+    {'rules': [{'scope': 'flow', 'match': {'in_port': 3}}]},
+    {'rules': [{'scope': 'flow', 'match': {'eht_type': 2048}}]},
+    {'rules': [{'scope': 'flow', 'match': {'eth_type': [2048]}}]},
+    {'rules': [{'treshold': 'anomaly'}]},
+])
+def test_invalid_policy_raises_value_error(tmp_path, policy):
+    with pytest.raises(ValueError):
+        load_policy(write_policy(tmp_path, policy))
+
+
+def test_flow_match_fields_are_accepted():
+    rule = Rule({'scope': 'flow', 'match': {'eth_type': 2048, 'ipv4_src': '10.0.0.1'}})
+    assert rule.match == {'eth_type': 2048, 'ipv4_src': '10.0.0.1'}
+
+
+def test_threshold_units():
+    capacity = 10 * 1_000_000 / 8
+    assert Rule({'threshold': 'max > 80%'}).limit(capacity) == 0.8 * capacity
+    assert Rule({'threshold': 'total > 8Mbps'}).limit(capacity) == 1_000_000
+    assert Rule({'threshold': 'rx > 500000'}).limit(capacity) == 500000
@@ -0,0 +1,58 @@
+import os
+import struct
+import time
+
+import trace_recorder
+from trace_recorder import IN, OUT, TraceRecorder, read_trace, replay, trace_files
+
+
+def message(xid):
+    # Minimal OpenFlow 1.3 header (PacketIn type) carrying the xid
+    return trace_recorder.OFP_HEADER.pack(4, 10, 8, xid)
+
+
+def test_round_trip_keeps_dpid_and_order_across_rotation(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = TraceRecorder(path, max_bytes=500, backups=10, buffer_size=100)
+    for xid in range(100):
+        recorder.record(IN if xid % 2 else OUT, xid % 4 + 1, message(xid))
+    recorder.close()
+
+    assert len(trace_files(path)) > 1
+    records = list(read_trace(path))
+    assert [struct.unpack_from('!I', buf, 4)[0] for _, _, _, buf in records] == list(range(100))
+    assert [dpid for _, dpid, _, _ in records] == [xid % 4 + 1 for xid in range(100)]
+    assert [direction for direction, _, _, _ in records] == [IN if xid % 2 else OUT for xid in range(100)]
+
+
+def test_idle_buffer_is_flushed(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = TraceRecorder(path, flush_interval=0.01)
+    recorder.record(IN, 1, message(1))
+    time.sleep(0.3)
+    try:
+        assert [dpid for _, dpid, _, _ in read_trace(path)] == [1]
+    finally:
+        recorder.close()
+
+
+def test_truncated_last_record_is_skipped(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = TraceRecorder(path)
+    recorder.record(IN, 1, message(1))
+    recorder.record(OUT, 2, message(2))
+    recorder.close()
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    assert [dpid for _, dpid, _, _ in read_trace(path)] == [1]
+
+
+def test_replay_passes_dpid(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = TraceRecorder(path)
+    recorder.record(IN, 7, message(1))
+    recorder.close()
+
+    seen = []
+    replay(path, lambda direction, dpid, buf: seen.append((direction, dpid, buf)), speed=0)
+    assert seen == [(IN, 7, message(1))]
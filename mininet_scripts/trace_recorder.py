@@ -0,0 +1,174 @@
+import collections
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+MAGIC = b'OFTR\x02'  # File signature followed by the format version
+
+# Record header: direction, datapath id, monotonic timestamp, length of the
+# OpenFlow bytes
+RECORD = struct.Struct('!BQdI')
+# OpenFlow header: version, type, length, xid
+OFP_HEADER = struct.Struct('!BBHI')
+
+IN = 0  # Message received from a switch
+OUT = 1  # Message sent to a switch
+
+
+class TraceRecorder(object):
+    """Append-only binary log of the OpenFlow messages seen by the controller.
+
+    Each record is the raw OpenFlow message prefixed with its direction,
+    the id of the datapath it was exchanged with, a monotonic timestamp and
+    its length. ``record`` only packs the record
+    into an in-memory buffer; full buffers are handed to a background
+    thread which does the file I/O and the size-based rotation. The same
+    thread writes out whatever is buffered once ``flush_interval`` passes
+    without a full buffer, so the last records reach the file even when
+    traffic stops.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backups=5,
+                 buffer_size=256 * 1024, flush_interval=1.0):
+        self.path = path
+        self.max_bytes = max_bytes  # Rotate once the current file grows past this size
+        self.backups = backups  # Number of rotated files kept (path.1 ... path.N)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffer = bytearray()
+        self.lock = threading.Lock()  # Guards buffer, shared with the writer thread
+        self.chunks = queue.Queue()
+        self.file = None
+        self.written = 0
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def record(self, direction, dpid, buf):
+        with self.lock:
+            self.buffer += RECORD.pack(direction, dpid or 0, time.monotonic(), len(buf))
+            self.buffer += buf
+            if len(self.buffer) >= self.buffer_size:
+                self.chunks.put(self._take())
+
+    def flush(self):
+        # Chunks are queued under the lock so the writer never takes the
+        # buffer ahead of an older chunk
+        with self.lock:
+            if self.buffer:
+                self.chunks.put(self._take())
+
+    def _take(self):
+        chunk = bytes(self.buffer)
+        self.buffer = bytearray()
+        return chunk
+
+    def close(self):
+        self.flush()
+        self.chunks.put(None)
+        self.writer.join()
+
+    def _open(self):
+        self.file = open(self.path, 'wb')
+        self.file.write(MAGIC)
+        self.written = len(MAGIC)
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = '%s.%d' % (self.path, i)
+            if os.path.exists(src):
+                os.replace(src, '%s.%d' % (self.path, i + 1))
+        if self.backups > 0:
+            os.replace(self.path, self.path + '.1')
+        self._open()
+
+    def _write_loop(self):
+        self._open()
+        while True:
+            try:
+                chunk = self.chunks.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Idle: write out the partial buffer, unless a chunk was
+                # queued in the meantime (it holds older records)
+                with self.lock:
+                    if not self.buffer or not self.chunks.empty():
+                        continue
+                    chunk = self._take()
+            if chunk is None:
+                break
+            # Rotation happens on chunk boundaries, which are always record
+            # boundaries, so every file can be read on its own
+            if self.written > len(MAGIC) and self.written + len(chunk) > self.max_bytes:
+                self._rotate()
+            self.file.write(chunk)
+            self.written += len(chunk)
+            self.file.flush()
+        self.file.close()
+
+
+def trace_files(path):
+    """Files making up a trace, oldest first."""
+    files = []
+    i = 1
+    while os.path.exists('%s.%d' % (path, i)):
+        files.append('%s.%d' % (path, i))
+        i += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_trace(path):
+    """Stream (direction, dpid, timestamp, buf) tuples from a trace and its backups."""
+    for name in trace_files(path):
+        with open(name, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not an OpenFlow trace" % name)
+            while True:
+                header = f.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    break
+                direction, dpid, timestamp, length = RECORD.unpack(header)
+                buf = f.read(length)
+                if len(buf) < length:
+                    break  # Truncated last record, the writer was interrupted
+                yield direction, dpid, timestamp, buf
+
+
+def replay(path, handler, speed=1.0):
+    """Feed a trace to ``handler(direction, dpid, buf)`` respecting its timing.
+
+    ``speed`` scales the original pace (2.0 is twice as fast); 0 replays
+    as fast as possible.
+    """
+    start = None
+    for direction, dpid, timestamp, buf in read_trace(path):
+        if speed > 0:
+            if start is None:
+                start = (timestamp, time.monotonic())
+            delay = (timestamp - start[0]) / speed - (time.monotonic() - start[1])
+            if delay > 0:
+                time.sleep(delay)
+        handler(direction, dpid, buf)
+
+
+if __name__ == '__main__':
+    # Print a summary of a trace: message count per direction and OpenFlow type
+    counts = collections.Counter()
+    dpids = set()
+    first = last = None
+    for direction, dpid, timestamp, buf in read_trace(sys.argv[1]):
+        version, msg_type, length, xid = OFP_HEADER.unpack_from(buf)
+        counts[('IN' if direction == IN else 'OUT', msg_type)] += 1
+        dpids.add(dpid)
+        first = timestamp if first is None else first
+        last = timestamp
+    for (direction, msg_type), count in sorted(counts.items()):
+        print("%-3s type %2d: %d" % (direction, msg_type, count))
+    if first is not None:
+        print("switches: %d" % len(dpids))
+        print("duration: %.3f s" % (last - first))